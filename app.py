@@ -40,18 +40,56 @@ ENVIRONMENT VARIABLES REQUIRED:
 - GOOGLE_SHEET_ID: The ID of your Google Sheet (from the URL)
 """
 
+import atexit
+import hmac
 import os
 import json
+import logging
+import queue
 import re
+import threading
+import time
 from datetime import datetime
-from urllib.parse import urlencode, quote
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
 
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import orjson
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from google.oauth2.service_account import Credentials
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.retry import Retry
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+    
+    orjson parses and serializes in C, so both the inbound webhook payload
+    and every `jsonify` response skip the stdlib `json` path. Types orjson
+    doesn't handle natively fall back to Flask's `default` hook.
+    """
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, no str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default), mimetype=self.mimetype
+        )
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # ==============================================================================
 # CONFIGURATION
@@ -62,21 +100,139 @@ ANDROID_SEND_URL = os.environ.get("ANDROID_SEND_URL")
 CRON_SECRET = os.environ.get("CRON_SECRET")
 GOOGLE_SHEET_ID = os.environ.get("GOOGLE_SHEET_ID")
 
+# GOOGLE_SHEET_ID never changes at runtime, see get_sheet_url()
+_SHEET_URL = f"https://docs.google.com/spreadsheets/d/{GOOGLE_SHEET_ID}" if GOOGLE_SHEET_ID else None
+
+# Parsed once at import; the credentials never change at runtime
+_CREDS_DICT = json.loads(GOOGLE_CREDENTIALS) if GOOGLE_CREDENTIALS else None
+
+# Scope for Google Sheets API
+GOOGLE_SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# ANDROID_SEND_URL split once; send_sms_prebuilt() only swaps in the query
+_PUSH_URL_PARTS = urlsplit(ANDROID_SEND_URL) if ANDROID_SEND_URL else None
+
+# Fixed outbound messages, URL-encoded once for send_sms_prebuilt()
+DAILY_CHECKIN_MESSAGE = "How were your symptoms today? Rate urgency (1-10) and describe."
+HELP_MESSAGE = (
+    "I didn't understand that. Send:\n"
+    "• Symptoms with urgency 1-10 to log\n"
+    "• 'Link' for spreadsheet URL\n"
+    "• 'Summary' for recent entries"
+)
+LOGGED_MESSAGE = "Logged. ✅"
+LOG_FAILED_MESSAGE = "⚠️ Couldn't log this, please resend: {body}"
+
+_DAILY_MSG_ENCODED = quote(DAILY_CHECKIN_MESSAGE, safe="")
+_HELP_MSG_ENCODED = quote(HELP_MESSAGE, safe="")
+_LOGGED_MSG_ENCODED = quote(LOGGED_MESSAGE, safe="")
+
+# Refresh the OAuth token this often, ahead of its 1-hour expiry
+TOKEN_REFRESH_INTERVAL_SECONDS = 50 * 60
+
+# How long a cached "Summary" result is served before a background refresh.
+# Refreshes are full tail reads: Sheets v4 values.get documents no ETag/304 support.
+SUMMARY_CACHE_TTL_SECONDS = 60
+
+# Longest a "Summary" waits for queued symptom writes before reading anyway
+SUMMARY_WRITE_WAIT_SECONDS = 5
+
+# Symptom entries queued within this window are written in one append
+WRITE_BATCH_WINDOW_SECONDS = 0.2
+
+# Failed sheet writes are retried this many times, backing off 1s, 2s, ...
+WRITE_RETRY_ATTEMPTS = 3
+WRITE_RETRY_BACKOFF_SECONDS = 1.0
+
+# Per-request timeout for Sheets API calls, so a hung call can't stall a worker
+SHEETS_TIMEOUT_SECONDS = 10
+
+# Upper bound on waiting for queued writes and SMS at process exit
+SHUTDOWN_DRAIN_SECONDS = 15
+
+# Logged fields in their default column order (header: Date | Time | Body | Urgency)
+SHEET_COLUMNS = ("date", "time", "body", "urgency")
+
+# Actions an incoming SMS can map to, see classify_message()
+ACT_LINK = "link"
+ACT_SUMMARY = "summary"
+ACT_LOG = "log"
+ACT_HELP = "help"
+
+_KEYWORDS = {"link": ACT_LINK, "summary": ACT_SUMMARY}
+
+# Commands (whole words, any case) or an urgency rating 1-10, in one pattern
+# so the message is scanned once instead of once per command
+_DISPATCH_RE = re.compile(r'\b(link|summary)\b|\b(10|[1-9])\b', re.IGNORECASE)
+
+# ==============================================================================
+# HTTP SESSIONS
+# ==============================================================================
+
+def _http_adapter() -> HTTPAdapter:
+    """
+    Build a pooled HTTP adapter that retries transient gateway errors.
+    
+    Mounted on both the Android push session and the gspread session so
+    connections (and their TLS handshakes) are reused across requests.
+    Retries are limited to idempotent methods, so the adapter never resends
+    a Sheets append (POST); the sheet writer decides that itself, see
+    `_write_never_landed`.
+    """
+    retry = Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False
+    )
+    return HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+
+
+# Keep-alive session for Join/AutoRemote pushes, see send_sms_prebuilt()
+_SESSION = requests.Session()
+_SESSION.mount("https://", _http_adapter())
+_SESSION.mount("http://", _http_adapter())
+
 # ==============================================================================
 # GOOGLE SHEETS SETUP
 # ==============================================================================
 
+# Worksheet handle shared by all requests, see get_google_sheet()
+_SHEET = None
+_CREDENTIALS = None
+_SHEET_LOCK = threading.Lock()
+
+# Last entries served to "Summary", see get_last_entries()
+_SUMMARY_CACHE = {"ts": 0.0, "data": None, "count": None, "gen": 0, "refreshing": False}
+_SUMMARY_LOCK = threading.Lock()
+
+# Sheet row number of the newest entry, see _fetch_last_entries()
+_LAST_ROW = None
+
+# Field name -> zero-based column, read once from the header row, see _load_sheet_layout()
+_HEADER_INDEX = {}
+
+# Guards _LAST_ROW and _HEADER_INDEX, shared by request, writer and refresher threads
+_LAYOUT_LOCK = threading.Lock()
+
+
 def get_google_sheet():
     """
     Authenticate with Google Sheets API and return the active worksheet.
     
     This function handles the complete OAuth2 authentication flow with Google's
-    Sheets API using service account credentials. It parses credentials from the
-    GOOGLE_CREDENTIALS environment variable, establishes an authorized session,
-    and returns the first worksheet of the configured spreadsheet.
+    Sheets API using service account credentials. The authorized client and
+    worksheet handle are built lazily on first use and cached at module level,
+    so subsequent calls return immediately without re-authorizing or
+    re-fetching the spreadsheet metadata. The OAuth token is kept fresh in
+    place by the background `_token_refresher` thread.
     
     This is the central data access layer for the symptom logging system,
-    called by both `append_symptom_log` for writes and `get_last_entries` for reads.
+    called by both `append_symptom_logs` for writes and `get_last_entries` for reads.
     
     Returns:
         gspread.Worksheet: The first worksheet of the configured Google Sheet,
@@ -85,81 +241,225 @@ def get_google_sheet():
     Raises:
         ValueError: If GOOGLE_CREDENTIALS or GOOGLE_SHEET_ID environment
             variables are not set.
-        json.JSONDecodeError: If GOOGLE_CREDENTIALS contains invalid JSON.
         gspread.exceptions.SpreadsheetNotFound: If the sheet ID doesn't exist
             or the service account lacks access.
     
     Key Technologies:
         - gspread: Google Sheets API client library
-        - oauth2client: ServiceAccountCredentials for authentication
+        - google-auth: Service account Credentials, refreshed in place by
+          the client's AuthorizedSession
+        - threading.Lock: Guards the cached worksheet across request threads
+        - _http_adapter: Keep-alive connection pool with transient-error retries
     """
+    global _SHEET, _CREDENTIALS
+    
     if not GOOGLE_CREDENTIALS:
         raise ValueError("GOOGLE_CREDENTIALS environment variable not set")
     
     if not GOOGLE_SHEET_ID:
         raise ValueError("GOOGLE_SHEET_ID environment variable not set")
     
-    # Parse credentials from JSON string
-    creds_dict = json.loads(GOOGLE_CREDENTIALS)
+    with _SHEET_LOCK:
+        if _SHEET is None:
+            # Authenticate
+            credentials = Credentials.from_service_account_info(
+                _CREDS_DICT, scopes=GOOGLE_SCOPES
+            )
+            client = gspread.authorize(credentials)
+            client.session.mount("https://", _http_adapter())
+            client.set_timeout(SHEETS_TIMEOUT_SECONDS)
+            
+            # Open sheet by ID and cache its first worksheet
+            _SHEET = client.open_by_key(GOOGLE_SHEET_ID).sheet1
+            _CREDENTIALS = credentials
+        
+        return _SHEET
+
+
+def batch_execute(ops: list[tuple]) -> dict:
+    """
+    Run a group of pending sheet operations with as few API calls as possible.
     
-    # Define scope for Google Sheets API
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
+    All appends are sent together through one `values.append` call and all
+    reads through one `values.batchGet` call, so a group costs at most two
+    requests against the Sheets API quota (100 requests/100s per user)
+    regardless of its size. The Sheets API has no endpoint that mixes reads
+    and writes, so two calls is the floor for a mixed group.
     
-    # Authenticate
-    credentials = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(credentials)
+    Args:
+        ops: Operations in submission order, each either
+            ("append", row) with a list of cell values, or
+            ("read", a1_range) with a range such as "A2:D".
+    
+    Returns:
+        dict: With keys:
+            - "append" (dict | None): The values.append response, or None
+              if no rows were appended
+            - "read" (list[list[list]]): The values of each read range, in
+              the order the reads were submitted
     
-    # Open sheet by ID and return first worksheet
-    spreadsheet = client.open_by_key(GOOGLE_SHEET_ID)
-    return spreadsheet.sheet1
+    Raises:
+        gspread.exceptions.APIError: If Google Sheets API request fails.
+    
+    Key Technologies:
+        - gspread.Worksheet.append_rows: Multi-row append in one request
+        - gspread.Worksheet.batch_get: Multi-range read in one request
+    """
+    rows = [arg for kind, arg in ops if kind == "append"]
+    ranges = [arg for kind, arg in ops if kind == "read"]
+    results = {"append": None, "read": []}
+    
+    sheet = get_google_sheet()
+    if rows:
+        results["append"] = sheet.append_rows(rows)
+    if ranges:
+        results["read"] = sheet.batch_get(ranges)
+    return results
 
 
-def append_symptom_log(body: str, urgency: int) -> bool:
+def append_symptom_logs(entries: list[tuple[str, int, datetime]]) -> bool:
     """
-    Append a symptom entry to the Google Sheets log.
+    Append symptom entries to the Google Sheets log.
     
-    Creates a new row in the symptom tracking spreadsheet with the current
-    timestamp and provided symptom data. This function is called from the
-    `/android-webhook` endpoint when a user sends a symptom report via SMS.
+    Creates one new row per entry in the symptom tracking spreadsheet with
+    the time the SMS was received and the provided symptom data. All rows
+    go out in a single append call. This function is called by the
+    background sheet writer for entries queued by `queue_symptom_log`.
     
     Args:
-        body: The raw SMS message text containing the symptom description.
-            This is stored as-is without modification.
-        urgency: Urgency rating from 1 (mild) to 10 (severe), extracted
-            from the user's SMS message.
+        entries: List of (body, urgency, logged_at) tuples, where body is
+            the raw SMS text (stored as-is), urgency is the 1 (mild) to
+            10 (severe) rating extracted from it, and logged_at is when
+            the SMS was received.
     
     Returns:
-        bool: True if the row was successfully appended.
+        bool: True if the rows were successfully appended.
     
     Raises:
         gspread.exceptions.APIError: If Google Sheets API request fails.
     
     Key Technologies:
-        - gspread.Worksheet.append_row: Atomic row append operation
+        - batch_execute: Sends all rows as a single values.append call
     """
-    sheet = get_google_sheet()
-    now = datetime.now()
-    row = [
-        now.strftime("%Y-%m-%d"),  # Date
-        now.strftime("%H:%M:%S"),  # Time
-        body,                       # Symptom description
-        urgency                     # Urgency rating 1-10
-    ]
-    sheet.append_row(row)
+    header_index, _ = _sheet_layout()
+    width = max(header_index.values()) + 1
+    
+    ops = []
+    for body, urgency, logged_at in entries:
+        date_str, time_str = _log_timestamp(logged_at)
+        fields = {
+            "date": date_str,
+            "time": time_str,
+            "body": body,          # Symptom description
+            "urgency": urgency     # Urgency rating 1-10
+        }
+        # Place each field under its header column
+        row = [""] * width
+        for field, i in header_index.items():
+            row[i] = fields[field]
+        ops.append(("append", row))
+    response = batch_execute(ops)["append"]
+    
+    # e.g. "Sheet1!A42:D43" -> the newest entry is row 43
+    updated_range = response["updates"]["updatedRange"].rpartition("!")[2]
+    _note_last_row(a1_range_to_grid_range(updated_range)["endRowIndex"])
+    
+    invalidate_summary_cache()
     return True
 
 
+def queue_symptom_log(body: str, urgency: int) -> None:
+    """
+    Queue a symptom entry for the background sheet writer.
+    
+    Called from the `/android-webhook` endpoint so Tasker gets its response
+    without waiting on the Sheets API. The receive time is captured here,
+    and the "Logged" confirmation SMS is sent once the row is written. The
+    summary cache is dropped right away so no "Summary" is served from data
+    older than this entry.
+    
+    Args:
+        body: The raw SMS message text containing the symptom description.
+        urgency: Urgency rating from 1 (mild) to 10 (severe).
+    
+    Key Technologies:
+        - queue.Queue: Thread-safe FIFO drained by the sheet writer thread
+    """
+    _WRITE_Q.put((body, urgency, datetime.now()))
+    invalidate_summary_cache()
+
+
+def _log_timestamp(logged_at: datetime) -> tuple[str, str]:
+    """Return the (date, time) strings stored for an entry, e.g. ("2026-01-02", "03:04:05")."""
+    # "YYYY-MM-DD HH:MM:SS" from one format call instead of two strftime calls
+    date_str, time_str = logged_at.isoformat(sep=" ", timespec="seconds").split(" ", 1)
+    return date_str, time_str
+
+
+def _write_never_landed(error: Exception) -> bool:
+    """
+    Tell whether a failed append provably did not reach the sheet.
+    
+    True for Sheets API rejections (HTTP 429 or 5xx) and for connection
+    failures before any request was sent. Anything else, notably a read
+    timeout, may have followed a committed write and is not safe to resend
+    blindly.
+    """
+    if isinstance(error, gspread.exceptions.APIError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        # Refused/unresolvable hosts surface as NewConnectionError, a
+        # ConnectTimeoutError subclass, wrapped in MaxRetryError.reason
+        return isinstance(getattr(error.args[0], "reason", None), ConnectTimeoutError)
+    return False
+
+
+def _unwritten_entries(
+    entries: list[tuple[str, int, datetime]]
+) -> list[tuple[str, int, datetime]] | None:
+    """
+    Drop entries that an append with a lost response already wrote.
+    
+    Re-reads the tail of the sheet and keeps only the entries whose date,
+    time and body don't appear there yet.
+    
+    Args:
+        entries: (body, urgency, logged_at) tuples from the failed append.
+    
+    Returns:
+        list | None: The entries still missing from the sheet, or None if
+            the sheet couldn't be read to check.
+    """
+    try:
+        # A few extra rows in case other entries were logged meanwhile
+        tail = _fetch_last_entries(len(entries) + 10)
+    except Exception as e:
+        app.logger.error("Failed to check the sheet for written entries: %s", e)
+        return None
+    
+    written = {(entry["date"], entry["time"], entry["body"]) for entry in tail}
+    return [
+        entry for entry in entries
+        if (*_log_timestamp(entry[2]), entry[0]) not in written
+    ]
+
+
 def get_last_entries(count: int = 3) -> list[dict]:
     """
     Retrieve the most recent symptom entries from the log.
     
-    Fetches all data from the Google Sheet and returns the last N entries.
-    This function is called from the `/android-webhook` endpoint when a
-    user sends the "Summary" command via SMS.
+    Serves the last N entries from an in-process cache. Results younger than
+    SUMMARY_CACHE_TTL_SECONDS are returned directly; older results are still
+    returned immediately while a background thread re-reads the sheet
+    (stale-while-revalidate). Only a cold cache, or one invalidated by a new
+    log entry, reads the sheet on the request path. If symptom entries are
+    still queued for the sheet writer, waits up to SUMMARY_WRITE_WAIT_SECONDS
+    for them to be written first. This function is called from the
+    `/android-webhook` endpoint when a user sends the "Summary" command via
+    SMS.
     
     Args:
         count: Number of recent entries to retrieve. Defaults to 3.
@@ -173,66 +473,220 @@ def get_last_entries(count: int = 3) -> list[dict]:
             Returns empty list if no entries exist.
     
     Key Technologies:
-        - gspread.Worksheet.get_all_values: Fetches entire sheet content
+        - threading.Thread: Background cache refresh off the request path
     """
-    sheet = get_google_sheet()
-    all_values = sheet.get_all_values()
+    # A just-logged entry may still be in the writer's queue; let it land
+    # first so the summary includes it
+    if _WRITE_Q.unfinished_tasks:
+        _join_queue(_WRITE_Q, time.monotonic() + SUMMARY_WRITE_WAIT_SECONDS)
+    
+    with _SUMMARY_LOCK:
+        cached = _SUMMARY_CACHE["data"]
+        if cached is not None and _SUMMARY_CACHE["count"] == count:
+            age = time.monotonic() - _SUMMARY_CACHE["ts"]
+            if age >= SUMMARY_CACHE_TTL_SECONDS and not _SUMMARY_CACHE["refreshing"]:
+                _SUMMARY_CACHE["refreshing"] = True
+                threading.Thread(
+                    target=_refresh_summary_cache,
+                    args=(count, _SUMMARY_CACHE["gen"]),
+                    daemon=True
+                ).start()
+            return cached
+        gen = _SUMMARY_CACHE["gen"]
+    
+    # Nothing usable cached yet, read the sheet on the request path
+    entries = _fetch_last_entries(count)
+    _store_summary_cache(count, gen, entries)
+    return entries
+
+
+def invalidate_summary_cache() -> None:
+    """
+    Drop the cached "Summary" entries after the log has changed.
+    
+    The next `get_last_entries` call reads the sheet directly so a freshly
+    logged entry is never hidden behind stale data, and any background
+    refresh already in flight is prevented from storing its result.
+    """
+    with _SUMMARY_LOCK:
+        _SUMMARY_CACHE["data"] = None
+        _SUMMARY_CACHE["ts"] = 0.0
+        _SUMMARY_CACHE["gen"] += 1
+
+
+def _store_summary_cache(count: int, gen: int, entries: list[dict]) -> None:
+    """Store fetched entries unless the cache was invalidated meanwhile."""
+    with _SUMMARY_LOCK:
+        if _SUMMARY_CACHE["gen"] == gen:
+            _SUMMARY_CACHE["data"] = entries
+            _SUMMARY_CACHE["count"] = count
+            _SUMMARY_CACHE["ts"] = time.monotonic()
+
+
+def _refresh_summary_cache(count: int, gen: int) -> None:
+    """Background target that re-reads the sheet into the summary cache."""
+    try:
+        _store_summary_cache(count, gen, _fetch_last_entries(count))
+    except Exception as e:
+        app.logger.error("Failed to refresh summary cache: %s", e)
+    finally:
+        with _SUMMARY_LOCK:
+            _SUMMARY_CACHE["refreshing"] = False
+
+
+def _sheet_layout() -> tuple[dict[str, int], int]:
+    """
+    Return a snapshot of (header index, last row), loading it on first use.
+    
+    Callers work on the returned locals rather than the module globals, so
+    another thread updating the layout mid-call can't affect them.
+    """
+    with _LAYOUT_LOCK:
+        if _HEADER_INDEX and _LAST_ROW is not None:
+            return _HEADER_INDEX, _LAST_ROW
+    return _load_sheet_layout()
+
+
+def _load_sheet_layout(reset: bool = False) -> tuple[dict[str, int], int]:
+    """
+    Read the header row and count the logged rows in one batchGet call.
+    
+    Populates _HEADER_INDEX from the header names so reads and appends
+    follow the sheet's column order even if the columns were rearranged.
+    A sheet without the expected header uses the default SHEET_COLUMNS
+    order. Also resets _LAST_ROW from the filled length of column A.
+    The sheet is read without holding _LAYOUT_LOCK; only the publish is
+    locked.
+    
+    Args:
+        reset: Let the count move _LAST_ROW backwards. Only for the recount
+            after rows were deleted; otherwise a newer row recorded by a
+            concurrent append is kept.
+    
+    Returns:
+        tuple[dict[str, int], int]: The header index and last row.
+    
+    Key Technologies:
+        - batch_execute: Header row and column A fetched together
+    """
+    global _HEADER_INDEX
+    
+    header, first_column = batch_execute([("read", "1:1"), ("read", "A:A")])["read"]
+    names = [name.strip().lower() for name in (header[0] if header else [])]
+    
+    if all(field in names for field in SHEET_COLUMNS):
+        header_index = {field: names.index(field) for field in SHEET_COLUMNS}
+    else:
+        header_index = {field: i for i, field in enumerate(SHEET_COLUMNS)}
+    
+    with _LAYOUT_LOCK:
+        _HEADER_INDEX = header_index
+    return header_index, _note_last_row(len(first_column), reset)
+
+
+def _note_last_row(row: int, reset: bool = False) -> int:
+    """
+    Record that the log extends at least to `row`; the only writer of _LAST_ROW.
+    
+    Moves _LAST_ROW forward only, so an older observation arriving late
+    can't overwrite a newer one. An under-estimate is harmless: the
+    open-ended tail read returns the extra rows. With `reset` (the recount
+    after rows were deleted) the value may go backwards.
+    
+    Returns:
+        int: The resulting _LAST_ROW.
+    """
+    global _LAST_ROW
+    
+    with _LAYOUT_LOCK:
+        if reset or _LAST_ROW is None:
+            _LAST_ROW = row
+        else:
+            _LAST_ROW = max(_LAST_ROW, row)
+        return _LAST_ROW
+
+
+def _fetch_last_entries(count: int) -> list[dict]:
+    """
+    Read the last N entries directly from the Google Sheet.
+    
+    Only the tail of the sheet is requested: the range starts N rows above
+    the last known entry and is left open-ended, so rows added elsewhere
+    (e.g. edited by hand in the browser) are still picked up. The header
+    layout and last row are loaded once by `_load_sheet_layout`, then the
+    last row is tracked from append responses.
+    
+    Key Technologies:
+        - batch_execute: Bounded A1 range read of the recent rows
+        - _sheet_layout: Snapshot of the cached header positions and last row
+    """
+    header_index, last_row = _sheet_layout()
     
-    # Skip header row if present, get last N rows
-    if len(all_values) <= 1:
+    width = max(header_index.values()) + 1
+    last_column = rowcol_to_a1(1, width).rstrip("1")
+    
+    # Row 1 is the header
+    start = max(2, last_row - count + 1)
+    rows = batch_execute([("read", f"A{start}:{last_column}")])["read"][0]
+    
+    if not rows:
+        if start > 2:
+            # Rows were deleted since they were counted, count again
+            _load_sheet_layout(reset=True)
+            return _fetch_last_entries(count)
         return []
     
-    data_rows = all_values[1:]  # Skip header
-    last_rows = data_rows[-count:] if len(data_rows) >= count else data_rows
+    _note_last_row(start + len(rows) - 1)
     
     entries = []
-    for row in last_rows:
-        if len(row) >= 4:
-            entries.append({
-                "date": row[0],
-                "time": row[1],
-                "body": row[2],
-                "urgency": row[3]
-            })
+    for row in rows[-count:]:
+        if row:
+            # The API trims trailing empty cells, so pad short rows
+            row += [""] * (width - len(row))
+            entries.append({field: row[i] for field, i in header_index.items()})
     return entries
 
 
-def get_sheet_url() -> str:
+def get_sheet_url() -> str | None:
     """
-    Generate the public URL for the Google Sheet.
+    Return the public URL for the Google Sheet.
     
-    Constructs the direct link to the symptom tracking spreadsheet using
-    the configured GOOGLE_SHEET_ID. Called when user sends "Link" command.
+    The direct link to the symptom tracking spreadsheet is built once at
+    import from the configured GOOGLE_SHEET_ID. Called when user sends
+    "Link" command.
     
     Returns:
-        str: The full Google Sheets URL for the configured spreadsheet.
+        str | None: The full Google Sheets URL for the configured
+            spreadsheet, or None if GOOGLE_SHEET_ID is not set.
     """
-    return f"https://docs.google.com/spreadsheets/d/{GOOGLE_SHEET_ID}"
+    return _SHEET_URL
 
 # ==============================================================================
 # SMS SENDING LOGIC
 # ==============================================================================
 
-def send_sms_via_android(message_text: str) -> bool:
+def send_sms_prebuilt(encoded_text: str) -> bool:
     """
-    Send SMS through Android phone via Join/AutoRemote push notification.
+    Send an already URL-encoded SMS through the Android phone.
     
-    Makes a GET request to ANDROID_SEND_URL with URL-encoded message.
+    Makes a GET request to ANDROID_SEND_URL with the encoded message.
     The URL should be a Join push URL or AutoRemote endpoint configured
     to trigger a Tasker task that sends the SMS. This is the gateway for
-    all outbound SMS communication from the bot.
+    all outbound SMS communication from the bot: the sender thread calls
+    it for everything queued by `queue_sms` (which encodes per message)
+    and `queue_sms_prebuilt` (fixed messages encoded once at import).
     
     Args:
-        message_text: The SMS content to send. Will be URL-encoded
-            automatically before transmission.
+        encoded_text: The SMS content, already encoded with
+            `quote(text, safe="")`.
     
     Returns:
         bool: True if the push request succeeded (HTTP 2xx), False if
             ANDROID_SEND_URL is not configured or request failed.
     
     Key Technologies:
-        - requests: HTTP library for the GET request
-        - urllib.parse.quote: URL encoding for the message text
+        - requests.Session: Pooled keep-alive connection for the GET request
+        - urllib.parse.urlunsplit: Rebuilds the URL around the merged query
         - Join/AutoRemote: Cloud-to-device push notification services
     """
     if not ANDROID_SEND_URL:
@@ -240,24 +694,226 @@ def send_sms_via_android(message_text: str) -> bool:
         return False
     
     try:
-        # URL-encode the message and append to the base URL
-        # Join URLs typically use ?text= parameter
-        encoded_message = quote(message_text)
-        
-        # Check if URL already has query params
-        separator = "&" if "?" in ANDROID_SEND_URL else "?"
-        full_url = f"{ANDROID_SEND_URL}{separator}text={encoded_message}"
+        # Join URLs typically use the ?text= parameter; merge it into the
+        # base URL's existing query (e.g. ?apikey=...) ahead of any #fragment
+        query = f"text={encoded_text}"
+        if _PUSH_URL_PARTS.query:
+            query = f"{_PUSH_URL_PARTS.query}&{query}"
+        full_url = urlunsplit(_PUSH_URL_PARTS._replace(query=query))
         
-        response = requests.get(full_url, timeout=10)
+        response = _SESSION.get(full_url, timeout=10)
         response.raise_for_status()
         
-        app.logger.info(f"SMS sent successfully: {message_text[:50]}...")
+        # Only decode the preview if INFO records are actually emitted
+        if app.logger.isEnabledFor(logging.INFO):
+            app.logger.info("SMS sent successfully: %.50s...", unquote(encoded_text))
         return True
         
     except requests.RequestException as e:
-        app.logger.error(f"Failed to send SMS via Android: {e}")
+        app.logger.error("Failed to send SMS via Android: %s", e)
         return False
 
+
+def queue_sms(message_text: str) -> None:
+    """
+    Queue an SMS for sending without waiting on the Android push.
+    
+    The webhook only needs the reply to go out eventually, so replies are
+    handed to a background sender thread and the HTTP response goes back
+    to Tasker without paying the push round trip (up to the 10s timeout).
+    Messages are sent one at a time in the order they were queued.
+    
+    Args:
+        message_text: The SMS content to send.
+    
+    Key Technologies:
+        - queue.Queue: Thread-safe FIFO drained by the sender thread
+    """
+    queue_sms_prebuilt(quote(message_text, safe=""))
+
+
+def queue_sms_prebuilt(encoded_text: str) -> None:
+    """Queue an already URL-encoded SMS, see queue_sms() and send_sms_prebuilt()."""
+    _SEND_Q.put(encoded_text)
+
+
+# ==============================================================================
+# BACKGROUND WORKERS
+# ==============================================================================
+
+def _send_worker() -> None:
+    """Background thread target that drains the outbound SMS queue."""
+    while True:
+        encoded_text = _SEND_Q.get()
+        try:
+            send_sms_prebuilt(encoded_text)
+        except Exception as e:
+            app.logger.error("Unexpected error sending queued SMS: %s", e)
+        finally:
+            _SEND_Q.task_done()
+
+
+def _write_worker() -> None:
+    """
+    Background thread target that drains the sheet write queue.
+    
+    Entries arriving within WRITE_BATCH_WINDOW_SECONDS of the first one are
+    coalesced into a single append, so a burst of SMS costs one Sheets API
+    call. A failed append is retried up to WRITE_RETRY_ATTEMPTS times with
+    exponential backoff, but only when the rows can't already be in the
+    sheet: a write that may have landed (e.g. a read timeout) is first
+    checked against the sheet's tail so no entry is written twice. A
+    confirmation SMS is queued for each entry once it is written, or a
+    "please resend" SMS if it couldn't be, so an entry is never dropped
+    silently.
+    """
+    while True:
+        batch = [_WRITE_Q.get()]
+        deadline = time.monotonic() + WRITE_BATCH_WINDOW_SECONDS
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                batch.append(_WRITE_Q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        pending = batch
+        try:
+            for attempt in range(1, WRITE_RETRY_ATTEMPTS + 1):
+                try:
+                    append_symptom_logs(pending)
+                    pending = []
+                    break
+                except Exception as e:
+                    app.logger.error(
+                        "Failed to log %d symptom entries (attempt %d/%d): %s",
+                        len(pending), attempt, WRITE_RETRY_ATTEMPTS, e
+                    )
+                    if _write_never_landed(e):
+                        pass
+                    elif isinstance(e, requests.RequestException):
+                        # e.g. a read timeout: the rows may have been saved
+                        # before the response was lost, so only resend the rest
+                        unwritten = _unwritten_entries(pending)
+                        if unwritten is None:
+                            break
+                        if len(unwritten) < len(pending):
+                            invalidate_summary_cache()
+                        pending = unwritten
+                        if not pending:
+                            break
+                    else:
+                        break
+                    if attempt < WRITE_RETRY_ATTEMPTS:
+                        time.sleep(WRITE_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            
+            for _ in range(len(batch) - len(pending)):
+                queue_sms_prebuilt(_LOGGED_MSG_ENCODED)
+            for body, _, _ in pending:
+                queue_sms(LOG_FAILED_MESSAGE.format(body=body[:30]))
+        finally:
+            for _ in batch:
+                _WRITE_Q.task_done()
+
+
+def _token_refresher() -> None:
+    """
+    Background thread target that refreshes the Sheets OAuth token early.
+    
+    Left alone, the first Sheets call after the 1-hour expiry pays a token
+    exchange round trip. Refreshing every TOKEN_REFRESH_INTERVAL_SECONDS
+    keeps that exchange off the request path. No lock is taken: the
+    client's AuthorizedSession reads the credentials' token on every
+    request, and the still-valid old token keeps working until the new
+    one is in place.
+    """
+    # Own session for the token endpoint, separate from the SMS sender's
+    auth_request = GoogleAuthRequest(requests.Session())
+    
+    while True:
+        time.sleep(TOKEN_REFRESH_INTERVAL_SECONDS)
+        if _CREDENTIALS is None:
+            continue
+        try:
+            _CREDENTIALS.refresh(auth_request)
+        except Exception as e:
+            app.logger.error("Failed to refresh Google OAuth token: %s", e)
+
+
+def _join_queue(q: queue.Queue, deadline: float) -> bool:
+    """Queue.join() that gives up at a time.monotonic() deadline."""
+    with q.all_tasks_done:
+        while q.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            q.all_tasks_done.wait(remaining)
+    return True
+
+
+def _drain_queues() -> None:
+    """
+    Let pending writes, then their confirmations, finish before exit.
+    
+    Waits at most SHUTDOWN_DRAIN_SECONDS in total so a hung push or Sheets
+    call can't hold up process shutdown.
+    """
+    deadline = time.monotonic() + SHUTDOWN_DRAIN_SECONDS
+    if not (_join_queue(_WRITE_Q, deadline) and _join_queue(_SEND_Q, deadline)):
+        app.logger.error(
+            "Exiting with %d sheet writes and %d SMS still queued",
+            _WRITE_Q.unfinished_tasks, _SEND_Q.unfinished_tasks
+        )
+
+
+# Pending work for the background threads, see queue_symptom_log() and queue_sms()
+_WRITE_Q = queue.Queue()
+_SEND_Q = queue.Queue()
+threading.Thread(target=_write_worker, name="sheet-writer", daemon=True).start()
+threading.Thread(target=_send_worker, name="sms-sender", daemon=True).start()
+threading.Thread(target=_token_refresher, name="token-refresher", daemon=True).start()
+atexit.register(_drain_queues)
+
+# ==============================================================================
+# MESSAGE PARSING
+# ==============================================================================
+
+def classify_message(body: str) -> tuple[str, int | None]:
+    """
+    Decide what an incoming SMS asks for in a single scan of its text.
+    
+    Commands take precedence over urgency ratings: "Link" wins over
+    "Summary", and either wins over a number anywhere in the message.
+    Matching is case-insensitive and limited to whole words, so "linked"
+    or "summarygate" are not commands.
+    
+    Args:
+        body: The stripped SMS message text.
+    
+    Returns:
+        tuple[str, int | None]: The action (ACT_LINK, ACT_SUMMARY, ACT_LOG
+            or ACT_HELP) and, for ACT_LOG, the first urgency rating found.
+    
+    Key Technologies:
+        - re.Pattern.finditer: One pass over the message for all tokens
+    """
+    action = ACT_HELP
+    urgency = None
+    
+    for match in _DISPATCH_RE.finditer(body):
+        keyword, rating = match.groups()
+        if keyword:
+            action = _KEYWORDS[keyword.lower()]
+            if action == ACT_LINK:
+                return ACT_LINK, None
+        elif urgency is None:
+            urgency = int(rating)
+    
+    if action == ACT_SUMMARY:
+        return ACT_SUMMARY, None
+    if urgency is not None:
+        return ACT_LOG, urgency
+    return ACT_HELP, None
+
 # ==============================================================================
 # ROUTES
 # ==============================================================================
@@ -281,7 +937,8 @@ def trigger_daily_checkin():
     Cron-triggered endpoint to send daily check-in SMS.
     
     Security: Requires ?secret=CRON_SECRET query parameter.
-    Action: Sends symptom check-in prompt to user via Android.
+    Action: Queues symptom check-in prompt to user via Android and returns
+    immediately; delivery failures are logged by the sender thread.
     
     Usage: Set up a cron job (e.g., cron-job.org) to hit this endpoint daily.
     """
@@ -291,23 +948,27 @@ def trigger_daily_checkin():
     if not CRON_SECRET:
         return jsonify({"error": "CRON_SECRET not configured on server"}), 500
     
-    if provided_secret != CRON_SECRET:
+    # Constant-time comparison so response timing can't leak the secret.
+    # Compare bytes: compare_digest rejects non-ASCII str arguments.
+    if not provided_secret or not hmac.compare_digest(
+        provided_secret.encode(), CRON_SECRET.encode()
+    ):
         return jsonify({"error": "Invalid or missing secret"}), 403
     
-    # Send the daily check-in prompt
-    message = "How were your symptoms today? Rate urgency (1-10) and describe."
-    success = send_sms_via_android(message)
-    
-    if success:
-        return jsonify({
-            "status": "success",
-            "message": "Daily check-in sent"
-        })
-    else:
+    if not ANDROID_SEND_URL:
         return jsonify({
             "status": "error",
-            "message": "Failed to send SMS"
+            "message": "ANDROID_SEND_URL not configured on server"
         }), 500
+    
+    # Queue the daily check-in prompt; the sender thread makes the push so
+    # the cron service gets its response without waiting on it
+    queue_sms_prebuilt(_DAILY_MSG_ENCODED)
+    
+    return jsonify({
+        "status": "queued",
+        "message": "Daily check-in queued"
+    })
 
 
 @app.route("/android-webhook", methods=["POST"])
@@ -328,7 +989,7 @@ def android_webhook():
     C) Retrieval - "Summary": Respond with last 3 symptom entries.
     """
     try:
-        data = request.get_json()
+        data = orjson.loads(request.get_data())
         
         if not data:
             return jsonify({"error": "No JSON payload received"}), 400
@@ -339,33 +1000,36 @@ def android_webhook():
         if not body:
             return jsonify({"error": "Empty message body"}), 400
         
-        app.logger.info(f"Received SMS from {sender}: {body}")
+        app.logger.info("Received SMS from %s: %s", sender, body)
         
-        body_lower = body.lower()
+        action, urgency = classify_message(body)
         
         # ----- Branch B: Retrieval - Link -----
-        if "link" in body_lower:
+        if action == ACT_LINK:
             sheet_url = get_sheet_url()
-            send_sms_via_android(f"📊 Your symptom log: {sheet_url}")
+            if sheet_url is None:
+                app.logger.error("GOOGLE_SHEET_ID not configured, can't send sheet link")
+                queue_sms("⚠️ The sheet link isn't configured on the server yet.")
+                return jsonify({"error": "GOOGLE_SHEET_ID not configured on server"}), 500
+            
+            queue_sms(f"📊 Your symptom log: {sheet_url}")
             return jsonify({
                 "status": "success",
                 "action": "sent_link"
             })
         
         # ----- Branch B: Retrieval - Summary -----
-        if "summary" in body_lower:
+        if action == ACT_SUMMARY:
             entries = get_last_entries(3)
             
             if not entries:
-                send_sms_via_android("No symptom entries recorded yet.")
+                queue_sms("No symptom entries recorded yet.")
             else:
-                summary_lines = ["📋 Last 3 entries:"]
-                for entry in entries:
-                    summary_lines.append(
-                        f"• {entry['date']}: {entry['body'][:30]}... (Urgency: {entry['urgency']})"
-                    )
-                summary_text = "\n".join(summary_lines)
-                send_sms_via_android(summary_text)
+                summary_text = "📋 Last 3 entries:\n" + "\n".join(
+                    f"• {entry['date']}: {entry['body'][:30]}... (Urgency: {entry['urgency']})"
+                    for entry in entries
+                )
+                queue_sms(summary_text)
             
             return jsonify({
                 "status": "success",
@@ -374,17 +1038,11 @@ def android_webhook():
             })
         
         # ----- Branch A: Data Entry (Symptom Logging) -----
-        # Look for urgency rating (1-10) in the message
-        urgency_match = re.search(r'\b(10|[1-9])\b', body)
-        
-        if urgency_match:
-            urgency = int(urgency_match.group(1))
-            
-            # Log to Google Sheets
-            append_symptom_log(body, urgency)
-            
-            # Send confirmation
-            send_sms_via_android("Logged. ✅")
+        # Message contained an urgency rating (1-10)
+        if action == ACT_LOG:
+            # Log to Google Sheets in the background; the writer sends
+            # the confirmation once the row is saved
+            queue_symptom_log(body, urgency)
             
             return jsonify({
                 "status": "success",
@@ -393,12 +1051,7 @@ def android_webhook():
             })
         
         # ----- Fallback: Unrecognized command -----
-        send_sms_via_android(
-            "I didn't understand that. Send:\n"
-            "• Symptoms with urgency 1-10 to log\n"
-            "• 'Link' for spreadsheet URL\n"
-            "• 'Summary' for recent entries"
-        )
+        queue_sms_prebuilt(_HELP_MSG_ENCODED)
         
         return jsonify({
             "status": "success",
@@ -408,7 +1061,7 @@ def android_webhook():
     except json.JSONDecodeError:
         return jsonify({"error": "Invalid JSON payload"}), 400
     except Exception as e:
-        app.logger.error(f"Error processing webhook: {e}")
+        app.logger.error("Error processing webhook: %s", e)
         return jsonify({"error": str(e)}), 500
 
 